@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 # gopherlib.py
 import socket
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 
 DEFAULT_PORT = 70
 SOCKET_TIMEOUT = 15
+RECV_BUFFER_SIZE = 65536
 
-@dataclass
+_VALID_TYPES = frozenset("0123456789+ghIisTtP;,dcruwWXsMT")
+# 128-entry lookup table: validity check is one ord() plus an index load.
+_VALID_TYPE_TABLE = bytes(1 if chr(i) in _VALID_TYPES else 0 for i in range(128))
+
+@dataclass(slots=True, frozen=True)
 class GopherURL:
     host: str
     port: int
@@ -34,26 +42,58 @@ def parse_gopher_url(url: str) -> 'GopherURL':
     type_char = selector_with_type[0]
     selector = selector_with_type[1:] if len(selector_with_type) > 1 else ""
 
-    valid_types = set("0123456789+ghIisTtP;,dcruwWXsMT")
-    if type_char not in valid_types:
+    code = ord(type_char)
+    if code >= 128 or not _VALID_TYPE_TABLE[code]:
         return GopherURL(host=host, port=port, type="1", selector=selector_with_type)
     return GopherURL(host=host, port=port, type=type_char, selector=selector)
 
-def _recv_all_lines(host: str, port: int, request_selector: str, suffix: str = "") -> List[str]:
+# getaddrinfo results keyed by (host, port): a session hammers the same
+# host for every menu item, so skip the DNS round trip on repeat fetches.
+_ADDR_CACHE: Dict[Tuple[str, int], Tuple[float, list]] = {}
+_ADDR_CACHE_TTL = 300.0
+
+def _resolve(host: str, port: int) -> list:
+    key = (host, port)
+    cached = _ADDR_CACHE.get(key)
+    now = time.monotonic()
+    if cached and now - cached[0] < _ADDR_CACHE_TTL:
+        return cached[1]
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    _ADDR_CACHE[key] = (now, infos)
+    return infos
+
+def _connect(host: str, port: int) -> socket.socket:
+    err: Optional[Exception] = None
+    for af, socktype, proto, _, sa in _resolve(host, port):
+        s = socket.socket(af, socktype, proto)
+        s.settimeout(SOCKET_TIMEOUT)
+        try:
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+        try:
+            s.connect(sa)
+            return s
+        except OSError as exc:
+            err = exc
+            s.close()
+    raise err if err else OSError(f"could not connect to {host}:{port}")
+
+def _recv_all_bytes(host: str, port: int, request_selector: str, suffix: str = "") -> bytes:
     request = f"{request_selector}{suffix}\r\n"
-    with socket.create_connection((host, port), timeout=SOCKET_TIMEOUT) as s:
+    with _connect(host, port) as s:
         s.sendall(request.encode("utf-8", errors="replace"))
         s.shutdown(socket.SHUT_WR)
-        chunks = []
-        while True:
-            data = s.recv(4096)
-            if not data:
-                break
-            chunks.append(data)
-    text = b"".join(chunks).decode("utf-8", errors="replace")
-    return text.splitlines()
-
-@dataclass
+        # Buffered read keeps the recv loop in C with a 64 KiB window
+        # instead of a Python loop of 4 KiB recv() calls.
+        with s.makefile("rb", buffering=RECV_BUFFER_SIZE) as f:
+            return f.read()
+
+def _recv_all_lines(host: str, port: int, request_selector: str, suffix: str = "") -> List[str]:
+    raw = _recv_all_bytes(host, port, request_selector, suffix)
+    return raw.decode("utf-8", errors="replace").splitlines()
+
+@dataclass(slots=True)
 class MenuEntry:
     type: str
     display: str
@@ -62,73 +102,116 @@ class MenuEntry:
     port: int
     attributes: Optional[Dict[str, List[str]]] = field(default=None)
 
-def _make_menu_entry(type_char: str, display: str, selector: str, host: str, port: str,
-                     attributes: Optional[Dict[str, List[str]]] = None) -> MenuEntry:
+def _parse_port(port: str) -> int:
     try:
         pnum = int(port) if port else DEFAULT_PORT
     except ValueError:
-        pnum = DEFAULT_PORT
-    return MenuEntry(
-        type=type_char or "i",
-        display=display,
-        selector=selector,
-        host=host or "",
-        port=pnum,
-        attributes=attributes.copy() if attributes else None,
-    )
-
-def parse_menu(lines: List[str]) -> List['MenuEntry']:
-    out: List[MenuEntry] = []
-    for line in lines:
-        if line.strip() == ".":
-            break
-        if not line:
+        return DEFAULT_PORT
+    if not 0 <= pnum <= 65535:
+        return DEFAULT_PORT
+    return pnum
+
+@dataclass(slots=True)
+class MenuTable:
+    # Column-per-field menu storage: paging and rendering index into the
+    # columns directly instead of walking a list of MenuEntry objects, and
+    # `selectable` holds the precomputed row indices of non-"i" entries.
+    types: List[str] = field(default_factory=list)
+    displays: List[str] = field(default_factory=list)
+    selectors: List[str] = field(default_factory=list)
+    hosts: List[str] = field(default_factory=list)
+    ports: array = field(default_factory=lambda: array("l"))
+    attributes: List[Optional[Dict[str, List[str]]]] = field(default_factory=list)
+    selectable: array = field(default_factory=lambda: array("l"))
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def add(self, type_char: str, display: str, selector: str, host: str, port: str,
+            attributes: Optional[Dict[str, List[str]]] = None) -> int:
+        row = len(self.types)
+        type_char = type_char or "i"
+        if type_char != "i":
+            self.selectable.append(row)
+        self.types.append(type_char)
+        self.displays.append(display)
+        self.selectors.append(selector)
+        self.hosts.append(host or "")
+        self.ports.append(_parse_port(port))
+        self.attributes.append(attributes)
+        return row
+
+    def entry(self, row: int) -> MenuEntry:
+        attrs = self.attributes[row]
+        return MenuEntry(
+            type=self.types[row],
+            display=self.displays[row],
+            selector=self.selectors[row],
+            host=self.hosts[row],
+            port=self.ports[row],
+            attributes=attrs.copy() if attrs else None,
+        )
+
+def parse_menu(raw: bytes) -> MenuTable:
+    table = MenuTable()
+    # Split in bytes (memchr under the hood) and decode only the lines
+    # actually consumed; menus stop at the '.' terminator. Method lookups
+    # are hoisted out of the loop for long directories.
+    add = table.add
+    for raw_line in raw.split(b"\n"):
+        raw_line = raw_line.rstrip(b"\r")
+        if not raw_line:
             continue
+        if raw_line == b".":
+            break
+        line = raw_line.decode("utf-8", errors="replace")
         type_char = line[0]
-        fields = line[1:].split("\t")
-        display = fields[0] if len(fields) > 0 else ""
-        selector = fields[1] if len(fields) > 1 else ""
-        host = fields[2] if len(fields) > 2 else ""
-        port = fields[3] if len(fields) > 3 else ""
-        out.append(_make_menu_entry(type_char, display, selector, host, port))
-    return out
-
-def parse_menu_plus(lines: List[str]) -> List[MenuEntry]:
-    entries: List[MenuEntry] = []
-    current_entry: Optional[MenuEntry] = None
+        # Bounded split: anything past the port field (e.g. a Gopher+ flag)
+        # lands in one tail element that is simply discarded.
+        fields = line[1:].split("\t", 4)[:4]
+        if len(fields) < 4:
+            fields += [""] * (4 - len(fields))
+        display, selector, host, port = fields
+        add(type_char, display, selector, host, port)
+    return table
+
+def parse_menu_plus(raw: bytes) -> MenuTable:
+    table = MenuTable()
+    current_row = -1
     current_attr: Optional[str] = None
     attr_buffer: List[str] = []
 
     def _flush_attr():
-        nonlocal current_attr, attr_buffer, current_entry
-        if current_entry is None or current_attr is None:
+        nonlocal current_attr, attr_buffer
+        if current_row < 0 or current_attr is None:
             attr_buffer.clear()
             current_attr = None
             return
-        attrs = current_entry.attributes or {}
+        attrs = table.attributes[current_row]
+        if attrs is None:
+            attrs = {}
+            table.attributes[current_row] = attrs
         attrs.setdefault(current_attr, []).extend(attr_buffer)
-        current_entry.attributes = attrs
         attr_buffer.clear()
         current_attr = None
 
-    for raw_line in lines:
-        line = raw_line.rstrip("\r")
-        if not line:
+    for raw_line in raw.split(b"\n"):
+        raw_line = raw_line.rstrip(b"\r")
+        if not raw_line:
             continue
-        if line == ".":
+        if raw_line == b".":
             if current_attr:
                 _flush_attr()
                 continue
             break
+        line = raw_line.decode("utf-8", errors="replace")
         if line.startswith("+INFO:"):
             if current_attr:
                 _flush_attr()
             info_line = line[len("+INFO:"):]
             if not info_line:
                 continue
-            entry = _make_menu_entry_from_info(info_line)
-            entries.append(entry)
-            current_entry = entry
+            current_row = _add_info_row(table, info_line)
             continue
         if line.startswith("+") and line.endswith(":") and ":" in line[1:]:
             if current_attr:
@@ -142,33 +225,38 @@ def parse_menu_plus(lines: List[str]) -> List[MenuEntry]:
     if current_attr:
         _flush_attr()
 
-    return entries
+    return table
 
-def _make_menu_entry_from_info(info_line: str) -> MenuEntry:
+def _add_info_row(table: MenuTable, info_line: str) -> int:
     type_char = info_line[0] if info_line else "i"
-    fields = info_line[1:].split("\t") if len(info_line) > 1 else []
-    display = fields[0] if len(fields) > 0 else ""
-    selector = fields[1] if len(fields) > 1 else ""
-    host = fields[2] if len(fields) > 2 else ""
-    port = fields[3] if len(fields) > 3 else ""
-    return _make_menu_entry(type_char, display, selector, host, port, attributes={})
-
-def _looks_like_gopher_plus(lines: List[str]) -> bool:
-    for line in lines:
-        if not line:
-            continue
-        return line.startswith("+INFO:")
-    return False
+    fields = info_line[1:].split("\t", 4)[:4]
+    if len(fields) < 4:
+        fields += [""] * (4 - len(fields))
+    display, selector, host, port = fields
+    return table.add(type_char, display, selector, host, port, attributes={})
+
+def _looks_like_gopher_plus(raw: bytes) -> bool:
+    # A Gopher+ response opens with '+INFO:' on its first non-empty line;
+    # one prefix check on the raw buffer beats splitting it into lines.
+    return raw.lstrip(b"\r\n").startswith(b"+INFO:")
+
+# Shared pool: fetches from concurrent sessions overlap here instead of
+# each _fetch_menu call spinning up (and tearing down) its own workers.
+_FETCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gopher-fetch")
 
-def _fetch_menu(host: str, port: int, selector: str) -> List[MenuEntry]:
+def _fetch_menu(host: str, port: int, selector: str) -> MenuTable:
+    # Race the Gopher+ probe against the plain fetch: when the server does
+    # not speak Gopher+ we no longer pay a second sequential round trip.
+    plus_future = _FETCH_POOL.submit(_recv_all_bytes, host, port, selector, "\t+")
+    plain_future = _FETCH_POOL.submit(_recv_all_bytes, host, port, selector)
     try:
-        plus_lines = _recv_all_lines(host, port, selector, suffix="\t+")
-        if _looks_like_gopher_plus(plus_lines):
-            return parse_menu_plus(plus_lines)
+        plus_raw = plus_future.result()
+        if _looks_like_gopher_plus(plus_raw):
+            plain_future.cancel()
+            return parse_menu_plus(plus_raw)
     except Exception:
         pass
-    lines = _recv_all_lines(host, port, selector)
-    return parse_menu(lines)
+    return parse_menu(plain_future.result())
 
 class GopherClient:
     def fetch(self, url: GopherURL) -> Tuple[str, object]:
@@ -198,7 +286,7 @@ class GopherClient:
         except Exception as e:
             return "binary", (0, f"Error fetching: {e}")
 
-    def search(self, endpoint: MenuEntry, query_payload: str) -> Tuple[str, List[MenuEntry]]:
+    def search(self, endpoint: MenuEntry, query_payload: str) -> Tuple[str, MenuTable]:
         if query_payload:
             selector_with_query = f"{endpoint.selector}\t{query_payload}"
         else:
@@ -7,20 +7,41 @@ from __future__ import annotations
 import os
 import socket
 import socketserver
+import stat
 import threading
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 CRLF = "\r\n"
 DEFAULT_MAP_NAMES = ("gophermap", ".gophermap")
+_ERROR_TEMPLATE = b"3%s\tfake\tlocalhost\t0\r\n.\r\n"
 
 
 class LocalGopherServer(socketserver.ThreadingTCPServer):
     allow_reuse_address = True
+    # Handler threads must not block interpreter shutdown, and a deeper
+    # accept backlog rides out connection bursts with a single listener.
+    daemon_threads = True
+    request_queue_size = 64
 
     def __init__(self, host: str, port: int, root_dir: str):
         self.root_dir = os.path.abspath(root_dir)
+        # Encoded responses keyed by path; entries are (mtime_ns, size,
+        # payload) so edits to the underlying file invalidate naturally.
+        self._payload_cache: Dict[str, Tuple[int, int, bytes]] = {}
+        self._cache_lock = threading.Lock()
         super().__init__((host, port), GopherRequestHandler)
 
+    def cache_get(self, path: str, st: os.stat_result) -> Optional[bytes]:
+        with self._cache_lock:
+            hit = self._payload_cache.get(path)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+        return None
+
+    def cache_put(self, path: str, st: os.stat_result, payload: bytes) -> None:
+        with self._cache_lock:
+            self._payload_cache[path] = (st.st_mtime_ns, st.st_size, payload)
+
 
 class GopherRequestHandler(socketserver.BaseRequestHandler):
     def handle(self):
@@ -32,19 +53,12 @@ class GopherRequestHandler(socketserver.BaseRequestHandler):
             pass
 
     def _read_selector(self) -> str:
-        chunks = []
+        # Buffered readline keeps the read-until-newline loop in C;
+        # selectors are a single short line.
         self.request.settimeout(10)
-        while True:
-            data = self.request.recv(1024)
-            if not data:
-                break
-            chunks.append(data)
-            if b"\n" in data:
-                break
-        raw = b"".join(chunks).decode("utf-8", errors="replace")
-        selector_line = raw.split("\n", 1)[0]
-        selector = selector_line.rstrip("\r")
-        return selector
+        with self.request.makefile("rb", buffering=4096) as f:
+            line = f.readline(4096)
+        return line.decode("utf-8", errors="replace").rstrip("\r\n")
 
     def _dispatch(self, selector: str) -> bytes:
         server: LocalGopherServer = self.server  # type: ignore[assignment]
@@ -55,10 +69,16 @@ class GopherRequestHandler(socketserver.BaseRequestHandler):
         if not rel_path:
             return self._serve_menu(server.root_dir)
 
-        if os.path.isdir(fs_path):
+        # One stat answers both the isdir and isfile questions.
+        try:
+            st = os.stat(fs_path)
+        except OSError:
+            return self._serve_error(f"Selector not found: {path_part or '/'}")
+
+        if stat.S_ISDIR(st.st_mode):
             return self._serve_menu(fs_path)
 
-        if os.path.isfile(fs_path):
+        if stat.S_ISREG(st.st_mode):
             return self._serve_text_file(fs_path)
 
         return self._serve_error(f"Selector not found: {path_part or '/'}")
@@ -68,40 +88,65 @@ class GopherRequestHandler(socketserver.BaseRequestHandler):
         if not map_path:
             return self._serve_error(f"No gophermap in {os.path.relpath(directory)}")
 
+        server: LocalGopherServer = self.server  # type: ignore[assignment]
         try:
-            with open(map_path, "r", encoding="utf-8") as fh:
-                lines = [line.rstrip("\r\n") for line in fh]
+            st = os.stat(map_path)
+            cached = server.cache_get(map_path, st)
+            if cached is not None:
+                return cached
+            with open(map_path, "rb") as fh:
+                data = fh.read()
         except OSError as exc:
             return self._serve_error(f"Failed to read menu: {exc}")
 
-        if not lines or lines[-1] != ".":
-            lines.append(".")
-
-        joined = CRLF.join(lines) + CRLF
-        return joined.encode("utf-8")
+        # Normalize line endings in bytes instead of splitting into a list
+        # of str lines and re-joining: fewer full copies of the map.
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        data = data.replace(b"\n", b"\r\n")
+        if data and not data.endswith(b"\r\n"):
+            data += b"\r\n"
+        if data != b".\r\n" and not data.endswith(b"\r\n.\r\n"):
+            data += b".\r\n"
+        server.cache_put(map_path, st, data)
+        return data
 
     def _serve_text_file(self, file_path: str) -> bytes:
+        server: LocalGopherServer = self.server  # type: ignore[assignment]
         try:
-            with open(file_path, "r", encoding="utf-8") as fh:
-                content = fh.read()
+            st = os.stat(file_path)
+            cached = server.cache_get(file_path, st)
+            if cached is not None:
+                return cached
+            with open(file_path, "rb") as fh:
+                data = fh.read()
         except OSError as exc:
             return self._serve_error(f"Failed to read file: {exc}")
 
-        body = content.replace("\r\n", "\n").replace("\r", "\n")
-        body = body.rstrip("\n")
-        payload = body + CRLF + "." + CRLF
-        return payload.encode("utf-8")
+        # Stay in bytes end to end: no decode/encode round trip and one
+        # CRLF rewrite instead of per-line string work.
+        body = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n").rstrip(b"\n")
+        payload = body.replace(b"\n", b"\r\n") + b"\r\n.\r\n"
+        server.cache_put(file_path, st, payload)
+        return payload
 
     def _serve_error(self, message: str) -> bytes:
-        lines = [f"3{message}\tfake\tlocalhost\t0", "."]
-        return (CRLF.join(lines) + CRLF).encode("utf-8")
+        return _ERROR_TEMPLATE % message.encode("utf-8", "replace")
 
 
 def _find_gophermap(directory: str) -> Optional[str]:
+    # Single scandir instead of one stat per candidate name; preference
+    # order of DEFAULT_MAP_NAMES is preserved when both exist.
+    found = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name in DEFAULT_MAP_NAMES and entry.is_file():
+                    found[entry.name] = entry.path
+    except OSError:
+        return None
     for name in DEFAULT_MAP_NAMES:
-        candidate = os.path.join(directory, name)
-        if os.path.isfile(candidate):
-            return candidate
+        if name in found:
+            return found[name]
     return None
 
 
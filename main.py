@@ -11,22 +11,38 @@ ENV (required/optional):
 import os
 import sys
 import time
-import re
 import shlex
-from typing import Dict, Optional, List
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional, List, Union
 
 from meshie import Meshie
+from meshie.chunker import chunk_message_smart
 from localgopher import start_local_gopher
 from gopherlib import (
     GopherClient,
     GopherURL,
     parse_gopher_url,
     MenuEntry,
+    MenuTable,
     up_one,
 )
 
-RE_MENU_CMD = re.compile(r"^\s*([upnbx]|[0-9]|s)\b(.*)$", re.IGNORECASE)
-RE_URL_CMD  = re.compile(r"^\s*u\s+(\S+)\s*$", re.IGNORECASE)
+def _cmd_open_url(session: "Session", rest: str) -> Optional[str]:
+    if not rest or " " in rest:
+        return None  # malformed URL command -> help
+    alias = _resolve_local_gopher_alias(rest)
+    return session.open_url(alias or rest)
+
+# First token -> handler(session, rest). The one-token command language
+# needs no regex engine; unknown tokens fall back to the help text.
+CMD_TABLE: Dict[str, Callable[["Session", str], Optional[str]]] = {
+    "n": lambda session, rest: session.next_page(),
+    "p": lambda session, rest: session.prev_page(),
+    "b": lambda session, rest: session.up(),
+    "x": lambda session, rest: session.current_url(),
+    "s": lambda session, rest: session.search(rest),
+    "u": _cmd_open_url,
+}
 
 HELP_TEXT = (
     "MeshGopher — Meshtastic DM Gopher Navigator\n"
@@ -50,9 +66,19 @@ HELP_TEXT = (
     "Source & docs live in this repository. Happy gophering!"
 )
 
+# Chunked once at import; every 'h'/'help' reply reuses this instead of
+# re-splitting the (constant) help text per request.
+HELP_CHUNKS = chunk_message_smart(HELP_TEXT, 200)
+
 MENU_PAGE_SIZE = 10
 FILE_PAGE_SIZE = 20
 
+# Memory bounds: deep browsing trims the oldest history states, and idle
+# senders are evicted least-recently-used so long-lived processes cannot
+# accumulate sessions without limit.
+HISTORY_MAX = 32
+MAX_SESSIONS = 128
+
 def _get_env_host_port():
     host = os.getenv("MESH_HOST")
     if not host:
@@ -73,14 +99,34 @@ class ViewState:
         self.url = url
         self.view_kind = view_kind  # "menu" | "file" | "binary" | "search"
         self.payload = payload
+        # The URL is immutable for the view's lifetime; format it once.
+        self.url_str = f"gopher://{url.host}:{url.port}/{url.type}{url.selector or ''}"
+        self.header = f"[{self.url_str}]"
+        # Menus are immutable too: format each selectable item once so
+        # paging only prepends the per-page index.
+        if view_kind == "menu":
+            self.item_lines = [
+                f"[{payload.types[row]}] {payload.displays[row] or '(no title)'}"
+                for row in payload.selectable
+            ]
+        else:
+            self.item_lines = []
         self.menu_offset = 0
         self.file_offset = 0
         self.pending_search_endpoint: Optional[MenuEntry] = None
+        # Normalized once when the endpoint is set; attribute dicts never
+        # change afterwards, so prompt re-renders reuse these.
+        self.search_fields: List[str] = []
+        self.search_notes: List[str] = []
+        # Rendered pages keyed by (view_kind, menu_offset, file_offset);
+        # the payload never mutates, so entries stay valid for the view's
+        # lifetime and re-rendering a visited page is a dict hit.
+        self._render_cache: Dict[tuple, str] = {}
 
 class Session:
     def __init__(self):
         self.client = GopherClient()
-        self.history: List[ViewState] = []
+        self.history: deque = deque(maxlen=HISTORY_MAX)
         self.current: Optional[ViewState] = None
 
     def open_url(self, url_str: str) -> str:
@@ -92,30 +138,26 @@ class Session:
         view_kind, payload = self.client.fetch(gurl)
         vs = ViewState(gurl, view_kind, payload)
         if view_kind == "search":
-            vs.pending_search_endpoint = payload  # MenuEntry
+            self._set_search_endpoint(vs, payload)  # MenuEntry
             self.current = vs
             return self._render_search_prompt()
         else:
             self.current = vs
-            self.history = [vs]
+            self.history.clear()
+            self.history.append(vs)
             return self.render()
 
-    def _selectable_entries(self) -> List[MenuEntry]:
-        if not self.current or self.current.view_kind != "menu":
-            return []
-        return [e for e in self.current.payload if e.type != "i"]
-
     def select_index(self, idx: int) -> str:
         if not self.current or self.current.view_kind != "menu":
             return "Not in a menu; numbers apply only to menu listings."
 
-        entries = self._selectable_entries()
+        table: MenuTable = self.current.payload
         start = self.current.menu_offset
-        page_entries = entries[start:start + MENU_PAGE_SIZE]
-        if idx < 0 or idx >= len(page_entries):
+        page_rows = table.selectable[start:start + MENU_PAGE_SIZE]
+        if idx < 0 or idx >= len(page_rows):
             return "Invalid selection on this page."
 
-        entry = page_entries[idx]
+        entry = table.entry(page_rows[idx])
         entry_url = GopherURL(
             host=entry.host or self.current.url.host,
             port=entry.port or self.current.url.port,
@@ -125,7 +167,7 @@ class Session:
 
         entry_type = (entry.type or "").lower()
         if entry_type in ("7", "t"):
-            self.current.pending_search_endpoint = entry
+            self._set_search_endpoint(self.current, entry)
             return self._render_search_prompt(display_title=entry.display)
 
         view_kind, payload = self.client.fetch(entry_url)
@@ -171,24 +213,22 @@ class Session:
         )
         view_kind, payload = self.client.fetch(parent_url)
         new_vs = ViewState(parent_url, view_kind, payload)
-        self.history = [new_vs]
+        self.history.clear()
+        self.history.append(new_vs)
         self.current = new_vs
         return self.render()
 
     def current_url(self) -> str:
         if not self.current:
             return "Nothing open yet."
-        url = self.current.url
-        selector = url.selector or ""
-        url_str = f"gopher://{url.host}:{url.port}/{url.type}{selector}"
+        url_str = self.current.url_str
         return f"Current URL:\n{url_str}\n\nUse: u {url_str}"
 
     def next_page(self) -> str:
         if not self.current:
             return "Nothing open yet."
         if self.current.view_kind == "menu":
-            entries = self._selectable_entries()
-            if self.current.menu_offset + MENU_PAGE_SIZE >= len(entries):
+            if self.current.menu_offset + MENU_PAGE_SIZE >= len(self.current.payload.selectable):
                 return "End of menu."
             self.current.menu_offset += MENU_PAGE_SIZE
             return self.render()
@@ -219,30 +259,43 @@ class Session:
         if not self.current:
             return "Nothing open yet."
         vs = self.current
-        header = f"[gopher://{vs.url.host}:{vs.url.port}/{vs.url.type}{vs.url.selector}]"
+        cache_key = (vs.view_kind, vs.menu_offset, vs.file_offset)
+        cached = vs._render_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        out = self._render_uncached(vs)
+        # The search prompt reads mutable pending-search state; cache the rest.
+        if vs.view_kind != "search":
+            vs._render_cache[cache_key] = out
+        return out
+
+    def _render_uncached(self, vs: ViewState) -> str:
+        header = vs.header
 
         if vs.view_kind == "menu":
-            entries = self._selectable_entries()
-            if not entries:
+            table: MenuTable = vs.payload
+            rows = table.selectable
+            if not rows:
                 return f"{header}\n(Empty menu)"
 
             start = vs.menu_offset
-            page = entries[start:start + MENU_PAGE_SIZE]
+            page_items = vs.item_lines[start:start + MENU_PAGE_SIZE]
 
-            lines = [header, f"Showing items {start + 1}-{start + len(page)} of {len(entries)}:"]
-            for i, e in enumerate(page):
-                n = i  # 0..9 on this page
-                disp = e.display or "(no title)"
-                lines.append(f"{n}) [{e.type}] {disp}")
+            lines = [header, f"Showing items {start + 1}-{start + len(page_items)} of {len(rows)}:"]
+            for n, item in enumerate(page_items):
+                # 0..9 on this page
+                lines.append(f"{n}) {item}")
             return "\n".join(lines)
 
         if vs.view_kind == "file":
             lines = vs.payload
             start = vs.file_offset
             page = lines[start:start + FILE_PAGE_SIZE]
-            body = "\n".join(page)
-            footer = f"\n[Lines {start + 1}-{start + len(page)} of {len(lines)}]"
-            return f"{header}\n{body}{footer}"
+            # One join builds the page; no intermediate body/footer strings.
+            parts = [header]
+            parts.extend(page)
+            parts.append(f"[Lines {start + 1}-{start + len(page)} of {len(lines)}]")
+            return "\n".join(parts)
 
         if vs.view_kind == "search":
             return self._render_search_prompt()
@@ -253,14 +306,19 @@ class Session:
 
         return f"{header}\n(Unknown view)"
 
+    def _set_search_endpoint(self, vs: ViewState, endpoint: MenuEntry) -> None:
+        vs.pending_search_endpoint = endpoint
+        vs.search_fields = self._search_fields(endpoint)
+        vs.search_notes = self._search_prompts(endpoint)
+
     def _render_search_prompt(self, display_title: Optional[str] = None) -> str:
         title = f"Search: {display_title}" if display_title else "Search"
         endpoint = self.current.pending_search_endpoint if self.current else None
         lines = [title]
         if endpoint and (endpoint.type or "").upper() == "T":
             lines.append("(Veronica/WAIS search)")
-        fields = self._search_fields(endpoint)
-        prompts = self._search_prompts(endpoint)
+        fields = self.current.search_fields if self.current else []
+        prompts = self.current.search_notes if self.current else []
         if fields:
             lines.append(f"Fields: {', '.join(fields)}")
             lines.append("Send: s field=value ... (use quotes for spaces)")
@@ -292,10 +350,17 @@ class Session:
         return notes
 
     def _build_search_query(self, endpoint: MenuEntry, terms: str) -> str:
-        tokens = shlex.split(terms)
+        # shlex is a slow char-by-char Python lexer; only quoted input
+        # needs it, plain terms split on whitespace.
+        if '"' in terms or "'" in terms:
+            tokens = shlex.split(terms)
+        else:
+            tokens = terms.split()
         if not tokens:
             return ""
-        fields = self._search_fields(endpoint)
+        # endpoint is always the current view's pending endpoint, whose
+        # fields were normalized when it was set.
+        fields = self.current.search_fields if self.current else self._search_fields(endpoint)
         named: Dict[str, str] = {}
         positional: List[str] = []
         for token in tokens:
@@ -325,21 +390,23 @@ class Session:
         return "\t".join(values)
 
 def _extract_text(packet) -> Optional[str]:
-    try:
-        decoded = packet.get("decoded") or {}
-        if isinstance(decoded, dict):
-            if "text" in decoded and isinstance(decoded["text"], str):
-                return decoded["text"]
-            payload = decoded.get("payload")
-            if payload and isinstance(payload, (bytes, bytearray)):
-                try:
-                    return payload.decode("utf-8", errors="replace")
-                except Exception:
-                    return None
-        if "text" in packet and isinstance(packet["text"], str):
-            return packet["text"]
-    except Exception:
-        pass
+    # Ordered for the common case: text DMs deliver decoded['text'] as str.
+    # The exact-type check skips the isinstance MRO walk on the hot path,
+    # and explicit shape checks keep the function exception-free (decode
+    # with errors='replace' cannot raise for bytes).
+    if not isinstance(packet, dict):
+        return None
+    decoded = packet.get("decoded")
+    if isinstance(decoded, dict):
+        text = decoded.get("text")
+        if text.__class__ is str:
+            return text
+        payload = decoded.get("payload")
+        if isinstance(payload, (bytes, bytearray)):
+            return payload.decode("utf-8", errors="replace")
+    text = packet.get("text")
+    if text.__class__ is str:
+        return text
     return None
 
 def _sender_id(packet) -> Optional[str]:
@@ -349,7 +416,19 @@ def _sender_id(packet) -> Optional[str]:
             return v
     return None
 
+# The env-derived base URL cannot change mid-process; computed on first
+# use and reused for every 'u local...' alias after that.
+_LOCAL_GOPHER_BASE: Optional[str] = None
+_LOCAL_GOPHER_BASE_KNOWN = False
+
 def _local_gopher_base_url() -> Optional[str]:
+    global _LOCAL_GOPHER_BASE, _LOCAL_GOPHER_BASE_KNOWN
+    if not _LOCAL_GOPHER_BASE_KNOWN:
+        _LOCAL_GOPHER_BASE = _compute_local_gopher_base_url()
+        _LOCAL_GOPHER_BASE_KNOWN = True
+    return _LOCAL_GOPHER_BASE
+
+def _compute_local_gopher_base_url() -> Optional[str]:
     explicit = os.getenv("LOCAL_GOPHER_URL")
     if explicit:
         return explicit.rstrip("/")
@@ -369,14 +448,15 @@ def _local_gopher_base_url() -> Optional[str]:
 
 def _resolve_local_gopher_alias(raw: str) -> Optional[str]:
     token = raw.strip()
-    if not token or not token.lower().startswith("local"):
+    lower = token.lower()
+    if not lower.startswith("local"):
         return None
     base = _local_gopher_base_url()
     if not base:
         return None
-    if token.lower() == "local":
+    if lower == "local":
         selector = ""
-    elif token.lower().startswith("local/"):
+    elif lower.startswith("local/"):
         selector = token[6:]
     else:
         return None
@@ -408,12 +488,18 @@ def _maybe_start_local_gopher():
 class App:
     def __init__(self, mesh: Meshie):
         self.mesh = mesh
-        self.sessions: Dict[str, Session] = {}
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
 
     def _get_session(self, sender: str) -> Session:
-        if sender not in self.sessions:
-            self.sessions[sender] = Session()
-        return self.sessions[sender]
+        session = self.sessions.get(sender)
+        if session is None:
+            session = Session()
+            self.sessions[sender] = session
+            if len(self.sessions) > MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(sender)
+        return session
 
     def on_receive(self, packet, interface):
         text = _extract_text(packet)
@@ -433,50 +519,29 @@ class App:
         if normalized in ("h", "help"):
             return self._send_help(sender, packet)
 
-        m_url = RE_URL_CMD.match(msg)
-        if m_url:
-            url = m_url.group(1)
-            alias = _resolve_local_gopher_alias(url)
-            if alias:
-                url = alias
-            out = session.open_url(url)
-            return self._reply_dm(sender, packet, out)
-
-        m_cmd = RE_MENU_CMD.match(msg)
-        if m_cmd:
-            cmd = m_cmd.group(1).lower()
-            rest = (m_cmd.group(2) or "").strip()
-
-            if cmd == "n":
-                out = session.next_page()
-                return self._reply_dm(sender, packet, out)
-            if cmd == "p":
-                out = session.prev_page()
-                return self._reply_dm(sender, packet, out)
-            if cmd == "b":
-                out = session.up()
-                return self._reply_dm(sender, packet, out)
-            if cmd == "x":
-                out = session.current_url()
-                return self._reply_dm(sender, packet, out)
-            if cmd == "s":
-                out = session.search(rest)
-                return self._reply_dm(sender, packet, out)
-            if cmd.isdigit():
-                idx = int(cmd)
-                out = session.select_index(idx)
+        head, _, rest = msg.partition(" ")
+        head = head.lower()
+        rest = rest.strip()
+
+        if len(head) == 1 and head.isdigit():
+            return self._reply_dm(sender, packet, session.select_index(int(head)))
+
+        handler = CMD_TABLE.get(head)
+        if handler:
+            out = handler(session, rest)
+            if out is not None:
                 return self._reply_dm(sender, packet, out)
 
         return self._send_help(sender, packet)
 
-    def _reply_dm(self, destination_id: str, packet: dict, text: str):
+    def _reply_dm(self, destination_id: str, packet: dict, text: Union[str, List[str]]):
         ch = 0
         if isinstance(packet, dict):
             ch = packet.get("channel", 0)
         self.mesh.send_direct_message_ordered(destination_id, text, channel=ch, chunk_size=200, retries=0)
 
     def _send_help(self, destination_id: str, packet: dict):
-        self._reply_dm(destination_id, packet, HELP_TEXT)
+        self._reply_dm(destination_id, packet, HELP_CHUNKS)
 
 def LocalOnReceiveBuilder(app: App):
     def handler(packet, interface):
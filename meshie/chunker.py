@@ -4,7 +4,8 @@ Utilities for splitting outbound messages into mesh-friendly chunks.
 
 from __future__ import annotations
 
-import re
+from bisect import bisect_right
+from functools import lru_cache
 from typing import List, Tuple
 
 from .constants import MAX_DM_BYTES
@@ -12,126 +13,174 @@ from .constants import MAX_DM_BYTES
 
 def chunk_message_smart(message: str, chunk_size: int) -> List[str]:
     """
-    Chunk messages with whitespace-aware splitting and paragraph breaks,
-    respecting a UTF-8 byte ceiling.
+    Chunk messages at whitespace boundaries, respecting a UTF-8 byte
+    ceiling. Multi-chunk messages are split optimally (minimum total
+    squared slack) so chunks come out evenly sized: a greedy split can
+    leave a tiny tail chunk that still costs a full pacing slot on air.
+
+    Results are memoized: bots resend the same help/status text
+    constantly, so repeat messages skip the pipeline entirely. Callers
+    get a fresh list; the cache holds immutable tuples.
     """
+    return list(_chunk_cached(message, chunk_size))
+
+
+@lru_cache(maxsize=256)
+def _chunk_cached(message: str, chunk_size: int) -> Tuple[str, ...]:
     max_bytes = max(1, min(chunk_size, MAX_DM_BYTES))
     payload = message if message else ""
     if not payload:
-        return [""]
-
+        return ("",)
+
+    # Most replies fit one chunk; answer those with a single byte-length
+    # check and edge trim instead of the full splitting pipeline.
+    is_ascii = payload.isascii()
+    encoded_len = len(payload) if is_ascii else len(payload.encode("utf-8"))
+    if encoded_len <= max_bytes:
+        cleaned = _trim_chunk_edges(payload)
+        return (cleaned,) if cleaned else ("",)
+
+    # Pure-ASCII text is byte-for-character, so break positions double
+    # as byte offsets and the cumulative byte-offset pass is skipped.
+    prefix = None if is_ascii else _utf8_prefix(payload)
+    breaks = _break_positions(payload, max_bytes, prefix)
     chunks: List[str] = []
-    idx = 0
-    length = len(payload)
-
-    while idx < length:
-        window, window_end = _utf8_window(payload, idx, max_bytes)
-        if not window:
-            window = payload[idx:min(idx + 1, length)]
-            window_end = idx + len(window)
-
-        if window_end >= length:
-            chunk_raw = window
-            idx = window_end
-        else:
-            split_idx = _find_split_index(window)
-            split_idx = _adjust_split_for_blank_and_short(window, split_idx)
-            split_idx = max(1, min(split_idx, len(window)))
-            chunk_raw = window[:split_idx]
-            idx += split_idx
-
-        cleaned = _trim_chunk_edges(chunk_raw)
+    for start, end in _optimal_cuts(breaks, max_bytes, prefix):
+        cleaned = _trim_chunk_edges(payload[start:end])
         if cleaned:
             chunks.append(cleaned)
+    return tuple(chunks) if chunks else ("",)
+
 
-    return chunks or [""]
-
-
-def _find_split_index(window: str) -> int:
-    newline_idx = window.rfind("\n")
-    if newline_idx > 0:
-        return newline_idx + 1
-    space_idx = _find_space_split(window)
-    if space_idx is not None and space_idx > 0:
-        return space_idx
-    return len(window)
-
-
-def _find_space_split(window: str) -> int | None:
-    for pos in range(len(window) - 1, -1, -1):
-        ch = window[pos]
-        if ch in (" ", "\t"):
-            return pos + 1
-    return None
-
-
-def _adjust_split_for_blank_and_short(window: str, split_idx: int) -> int:
-    split_idx = _remove_trailing_blank_lines(window, split_idx)
-    split_idx = _avoid_short_last_line(window, split_idx)
-    return split_idx
-
-
-def _remove_trailing_blank_lines(text: str, split_idx: int) -> int:
-    if split_idx <= 0:
-        return split_idx
-    slice_text = text[:split_idx]
-    trimmed = re.sub(r"(?:\r?\n[ \t]*)+$", "", slice_text)
-    if trimmed:
-        return len(trimmed)
-    return split_idx
-
-
-def _avoid_short_last_line(text: str, split_idx: int) -> int:
-    if split_idx <= 0:
-        return split_idx
-    slice_text = text[:split_idx]
-    without_newlines = slice_text.rstrip("\r\n")
-    if not without_newlines:
-        return split_idx
-    last_newline = without_newlines.rfind("\n")
-    if last_newline == -1:
-        last_line = without_newlines.replace("\r", "")
-        if len(last_line) < 5:
-            return split_idx
-        return split_idx
-    last_line = without_newlines[last_newline + 1:].replace("\r", "")
-    if len(last_line) < 5:
-        return last_newline + 1
-    return split_idx
+def _break_positions(payload: str, max_bytes: int, prefix: List[int] | None) -> List[int]:
+    """
+    Positions where a chunk may end: after each whitespace character,
+    plus the end of the payload. Whitespace-free runs wider than the
+    byte budget get hard breaks inserted so every adjacent pair of
+    positions stays within budget (modulo single oversized codepoints).
+    """
+    n = len(payload)
+    candidates = [i + 1 for i, ch in enumerate(payload) if ch in " \t\n"]
+    if not candidates or candidates[-1] != n:
+        candidates.append(n)
+
+    positions = [0]
+    for pos in candidates:
+        prev = positions[-1]
+        if prefix is None:
+            while pos - prev > max_bytes:
+                prev += max_bytes
+                positions.append(prev)
+        else:
+            while prefix[pos] - prefix[prev] > max_bytes:
+                cut = bisect_right(prefix, prefix[prev] + max_bytes) - 1
+                if cut <= prev:
+                    cut = prev + 1  # oversized single char: emit it anyway
+                positions.append(cut)
+                prev = cut
+        if pos != prev:
+            positions.append(pos)
+    return positions
+
+
+def _optimal_cuts(breaks: List[int], max_bytes: int, prefix: List[int] | None):
+    """
+    Minimum-cost split over the feasible break positions, cost per chunk
+    being (max_bytes - chunk_bytes)**2. The inner scan only visits
+    predecessors within the byte budget, so this is O(breaks * breaks
+    per window), not quadratic in the message.
+    """
+    bofs = breaks if prefix is None else [prefix[p] for p in breaks]
+    m = len(breaks)
+    inf = float("inf")
+    best = [0.0] + [inf] * (m - 1)
+    back = [0] * m
+    for i in range(1, m):
+        bi = bofs[i]
+        for j in range(i - 1, -1, -1):
+            width = bi - bofs[j]
+            if width > max_bytes:
+                break
+            cost = best[j] + (max_bytes - width) ** 2
+            if cost < best[i]:
+                best[i] = cost
+                back[i] = j
+        if best[i] == inf:
+            # Only reachable via an oversized single-codepoint hard
+            # break; take the adjacent predecessor like the old greedy
+            # splitter did.
+            best[i] = best[i - 1]
+            back[i] = i - 1
+
+    cuts: List[int] = []
+    i = m - 1
+    while i > 0:
+        cuts.append(i)
+        i = back[i]
+    cuts.reverse()
+    spans = []
+    start = breaks[0]
+    for c in cuts:
+        spans.append((start, breaks[c]))
+        start = breaks[c]
+    return spans
 
 
 def _trim_chunk_edges(text: str) -> str:
     if not text:
         return ""
-    trimmed = re.sub(r"^(?:[ \t]*\r?\n)+", "", text)
-    trimmed = re.sub(r"(?:\r?\n[ \t]*)+$", "", trimmed)
-    return trimmed.strip("\r")  # retain intentional spaces but drop stray CRs
-
-
-def _utf8_window(text: str, start: int, max_bytes: int) -> Tuple[str, int]:
-    idx = start
-    length = len(text)
-    used = 0
-    while idx < length:
-        char_len = _utf8_char_len(text[idx])
-        if used + char_len > max_bytes:
+    # Hand scans in place of the blank-line regexes: this runs per chunk
+    # and the patterns only ever match at the string edges anyway.
+    # Leading: drop whole blank lines, i.e. cut through the last newline
+    # reachable via spaces/tabs (CR only counts as part of CRLF).
+    n = len(text)
+    start = 0
+    i = 0
+    while i < n:
+        ch = text[i]
+        if ch == " " or ch == "\t":
+            i += 1
+        elif ch == "\n":
+            i += 1
+            start = i
+        elif ch == "\r" and i + 1 < n and text[i + 1] == "\n":
+            i += 2
+            start = i
+        else:
             break
-        used += char_len
-        idx += 1
-    if idx == start and idx < length:
-        idx += 1
-    return text[start:idx], idx
+    # Trailing: cut from the first newline of the trailing blank run;
+    # spaces/tabs before it stay.
+    end = n
+    i = n - 1
+    while i >= start:
+        ch = text[i]
+        if ch == " " or ch == "\t":
+            i -= 1
+        elif ch == "\n":
+            if i > start and text[i - 1] == "\r":
+                end = i - 1
+                i -= 2
+            else:
+                end = i
+                i -= 1
+        else:
+            break
+    return text[start:end].strip("\r")  # retain intentional spaces but drop stray CRs
+
+
+def _utf8_prefix(text: str) -> List[int]:
+    prefix = [0] * (len(text) + 1)
+    total = 0
+    for i, ch in enumerate(text):
+        total += _utf8_char_len(ch)
+        prefix[i + 1] = total
+    return prefix
 
 
 def _utf8_char_len(ch: str) -> int:
+    # Branchless width: each comparison adds one byte past the ASCII base.
     code = ord(ch)
-    if code <= 0x7F:
-        return 1
-    if code <= 0x7FF:
-        return 2
-    if code <= 0xFFFF:
-        return 3
-    return 4
+    return 1 + (code > 0x7F) + (code > 0x7FF) + (code > 0xFFFF)
 
 
 __all__ = ["chunk_message_smart"]
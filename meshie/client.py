@@ -4,18 +4,43 @@ Meshie client implementation (connection handling, DM helpers, chunked sends).
 
 from __future__ import annotations
 
+import queue
+import random
+import sys
 import threading
 import time
-from typing import Callable, List, Optional
+from collections import deque
+from typing import Callable, Optional, Sequence, Union
 
 import meshtastic
 import meshtastic.tcp_interface
 from pubsub import pub
 
 from .chunker import chunk_message_smart
+from .constants import SEEN_RING_SIZE
 from .filters import is_direct_to, is_text_packet
 
 
+class _SeenRing:
+    """Bounded ring of recent packet ids for duplicate suppression."""
+
+    def __init__(self, size: int = SEEN_RING_SIZE):
+        self._order: deque = deque(maxlen=size)
+        self._members: set = set()
+
+    def seen(self, packet_id) -> bool:
+        """Record packet_id; return True if it was already present."""
+        if packet_id is None:
+            return False
+        if packet_id in self._members:
+            return True
+        if len(self._order) == self._order.maxlen:
+            self._members.discard(self._order[0])
+        self._order.append(packet_id)
+        self._members.add(packet_id)
+        return False
+
+
 class Meshie:
     def __init__(self, address: str, port: int = 4403, verbose: bool = True):
         self.address = address
@@ -25,9 +50,25 @@ class Meshie:
         # Pace between multi-chunk sends to preserve ordering & avoid RF bursts
         self.inter_chunk_delay_sec: float = 1.2
 
-        # Callback registries
-        self.callbacks: List[Callable] = []     # generic: all packets
-        self.dm_callbacks: List[Callable] = []  # DM-only
+        # Callback registries as immutable tuples: registration publishes
+        # a new tuple (assignment is atomic under the GIL), so dispatch
+        # can iterate the attribute directly with zero per-packet copies.
+        self.callbacks: tuple = ()     # generic: all packets
+        self.dm_callbacks: tuple = ()  # DM-only
+
+        # Mesh hops can redeliver the same packet; drop repeats so one DM
+        # cannot trigger the full fetch pipeline twice. Each subscription
+        # gets its own ring since both fire for the same text packet.
+        self._seen_text = _SeenRing()
+        self._seen_any = _SeenRing()
+
+        # Outbound DM queues: one FIFO and one worker thread per
+        # destination, spawned lazily. Paced multi-chunk replies drain in
+        # the background instead of blocking the RX callback thread, and
+        # ordering holds per destination because each queue has exactly
+        # one consumer.
+        self._tx_queues: dict = {}
+        self._tx_lock = threading.Lock()
 
         if self.verbose:
             print(f"[Meshie] Connecting to {address}:{port} …")
@@ -61,14 +102,17 @@ class Meshie:
             self.my_user = self.interface.getMyUser()  # dict with 'id', 'longName', etc.
             if isinstance(self.my_user, dict):
                 self.my_id = self.my_user.get("id")
+            if self.my_id:
+                # Interned so the per-packet toId comparison can hit the
+                # pointer-equality fast path in is_direct_to().
+                self.my_id = sys.intern(self.my_id)
             if self.verbose:
                 print(f"[Meshie] my_id={self.my_id}")
         except Exception as e:
             print(f"[Meshie] Warning: could not read my user: {e}")
 
-        # Keep process alive (meshtastic lib handles actual RX/TX in background)
-        self.listener_thread = threading.Thread(target=self._run_listener, daemon=True)
-        self.listener_thread.start()
+        # No keepalive thread needed: the meshtastic interface runs its own
+        # RX/TX threads and the embedding program owns the process lifetime.
 
     # ---------- Public API ----------
 
@@ -77,14 +121,14 @@ class Meshie:
         Register a generic receiver: callback(packet, interface)
         Receives ALL packets (including DMs), useful for logging/metrics.
         """
-        self.callbacks.append(callback)
+        self.callbacks = self.callbacks + (callback,)
 
     def register_direct_receiver(self, callback: Callable):
         """
         Register a DM-only receiver: callback(packet, interface)
         Triggered only when a decoded TEXT message is addressed to this node.
         """
-        self.dm_callbacks.append(callback)
+        self.dm_callbacks = self.dm_callbacks + (callback,)
 
     def send_message(self, message: str, channel: int = 0):
         """
@@ -126,51 +170,97 @@ class Meshie:
     def send_direct_message_ordered(
         self,
         destination_id: str,
-        message: str,
+        message: Union[str, Sequence[str]],
         channel: int = 0,
         chunk_size: int = 190,
         retries: int = 0,
     ):
         """
-        Send a (possibly long) message as *ordered* chunks with simple pacing.
-        We request radio ACKs but DO NOT block on waitForAckNak(), since it may
-        not return reliably over TCP. Instead, we pace between chunks.
+        Queue a (possibly long) message as *ordered* chunks with simple
+        pacing. Returns immediately: chunks are drained by the
+        destination's dedicated sender thread, so a long paced reply never
+        blocks the caller (typically the RX callback). We request radio
+        ACKs but DO NOT block on waitForAckNak(), since it may not return
+        reliably over TCP. Send failures are logged, not raised.
 
         Args:
           destination_id: Node ID like '!abcd1234'
-          message:        Full message to chunk and send
+          message:        Full message to chunk and send, or an already
+                          chunked sequence of strings (sent as-is, in order)
           channel:        Channel index to use (DM still uses this index)
-          chunk_size:     Max bytes per chunk (UTF-8, capped at 200)
+          chunk_size:     Max bytes per chunk (UTF-8, capped at 200);
+                          ignored for pre-chunked input
           retries:        Per-chunk retry attempts on sendText exceptions
         """
-        chunks = chunk_message_smart(message, chunk_size)
+        if isinstance(message, (list, tuple)):
+            chunks = list(message)
+        else:
+            chunks = chunk_message_smart(message, chunk_size)
 
         total = len(chunks)
+        tx_queue = self._tx_queue_for(destination_id)
         for idx, chunk in enumerate(chunks, 1):
-            attempt = 0
-            while True:
-                attempt += 1
-                try:
-                    if self.verbose:
-                        print(
-                            f"[Meshie] DM (paced) -> {destination_id} ch={channel} "
-                            f"chunk {idx}/{total} attempt {attempt}"
-                        )
-                    self.interface.sendText(
-                        chunk,
-                        destinationId=destination_id,
-                        channelIndex=channel,
-                        wantAck=True,        # ask radio for ack, but don't block on it
-                        wantResponse=False,
+            tx_queue.put((chunk, idx, total, channel, retries))
+
+    def _tx_queue_for(self, destination_id: str) -> "queue.Queue":
+        with self._tx_lock:
+            tx_queue = self._tx_queues.get(destination_id)
+            if tx_queue is None:
+                tx_queue = queue.Queue()
+                self._tx_queues[destination_id] = tx_queue
+                worker = threading.Thread(
+                    target=self._tx_worker,
+                    args=(destination_id, tx_queue),
+                    daemon=True,
+                    name=f"meshie-tx-{destination_id}",
+                )
+                worker.start()
+            return tx_queue
+
+    def _tx_worker(self, destination_id: str, tx_queue: "queue.Queue"):
+        # Pacing as an earliest-next-send deadline rather than a flat
+        # sleep after every chunk: a chunk that arrives after the radio
+        # has been quiet goes out immediately, and back-to-back chunks
+        # only wait out whatever is left of the pacing window. The state
+        # is one local per worker, which is per destination by
+        # construction.
+        next_send = 0.0
+        while True:
+            chunk, idx, total, channel, retries = tx_queue.get()
+            wait = next_send - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._send_chunk(destination_id, chunk, idx, total, channel, retries)
+            next_send = time.monotonic() + self.inter_chunk_delay_sec
+
+    def _send_chunk(self, destination_id: str, chunk: str, idx: int, total: int,
+                    channel: int, retries: int):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if self.verbose:
+                    print(
+                        f"[Meshie] DM (paced) -> {destination_id} ch={channel} "
+                        f"chunk {idx}/{total} attempt {attempt}"
                     )
-                    # Key pacing: give air time so chunks keep order over the mesh
-                    time.sleep(self.inter_chunk_delay_sec)
-                    break
-                except Exception as e:
-                    if attempt > retries:
-                        print(f"[Meshie] DM chunk failed after {retries} retries: {e}")
-                        raise
-                    time.sleep(1.5)  # simple backoff and retry
+                self.interface.sendText(
+                    chunk,
+                    destinationId=destination_id,
+                    channelIndex=channel,
+                    wantAck=True,        # ask radio for ack, but don't block on it
+                    wantResponse=False,
+                )
+                return
+            except Exception as e:
+                if attempt > retries:
+                    print(f"[Meshie] DM chunk failed after {retries} retries: {e}")
+                    return
+                # Exponential backoff with jitter: retry fast when a
+                # transient fault clears quickly, and desynchronize
+                # workers retrying against the same interface.
+                delay = min(0.25 * (1 << attempt), 8.0) * random.uniform(0.75, 1.25)
+                time.sleep(delay)
 
     # ---------- Internals ----------
 
@@ -183,25 +273,27 @@ class Meshie:
         print("[Meshie] connection.lost")
 
     def _on_receive_text(self, packet, interface, topic=pub.AUTO_TOPIC):
+        # Generic callbacks are dispatched from _on_receive_any only; the
+        # "meshtastic.receive" topic fires for text packets too, so doing
+        # both here invoked every generic callback twice per text packet.
         try:
+            if self._seen_text.seen(_packet_id(packet)):
+                return
             is_dm = is_text_packet(packet) and is_direct_to(packet, self.my_id)
             if is_dm:
-                for cb in list(self.dm_callbacks):
+                for cb in self.dm_callbacks:
                     try:
                         cb(packet, interface)
                     except Exception as e:
                         print(f"[Meshie] DM callback error: {e}")
-            for cb in list(self.callbacks):
-                try:
-                    cb(packet, interface)
-                except Exception as e:
-                    print(f"[Meshie] receiver callback error: {e}")
         except Exception as e:
             print(f"[Meshie] _on_receive_text error: {e}")
 
     def _on_receive_any(self, packet, interface, topic=pub.AUTO_TOPIC):
         try:
-            for cb in list(self.callbacks):
+            if self._seen_any.seen(_packet_id(packet)):
+                return
+            for cb in self.callbacks:
                 try:
                     cb(packet, interface)
                 except Exception as e:
@@ -209,9 +301,11 @@ class Meshie:
         except Exception as e:
             print(f"[Meshie] _on_receive_any error: {e}")
 
-    def _run_listener(self):
-        while True:
-            time.sleep(1)
+def _packet_id(packet):
+    try:
+        return packet.get("id") or packet.get("packetId")
+    except AttributeError:
+        return None
 
 
 __all__ = ["Meshie"]
@@ -3,5 +3,6 @@ Shared constants for the meshie package.
 """
 
 MAX_DM_BYTES = 200
+SEEN_RING_SIZE = 4096
 
-__all__ = ["MAX_DM_BYTES"]
+__all__ = ["MAX_DM_BYTES", "SEEN_RING_SIZE"]
@@ -8,35 +8,41 @@ from typing import Any, Dict, Optional
 
 import meshtastic
 
+# Resolved once at import: the protobuf enum attribute lookup is too
+# expensive to repeat for every packet on the RX path.
+try:
+    _TEXT_MESSAGE_APP_INT = int(meshtastic.portnums_pb2.PortNum.TEXT_MESSAGE_APP)
+except Exception:
+    _TEXT_MESSAGE_APP_INT = -999
+
 
 def is_text_packet(packet: Dict[str, Any]) -> bool:
     """
     Heuristic: treat packets with decoded.text or portnum TEXT_MESSAGE_APP as text.
     portnum may be a string ('TEXT_MESSAGE_APP') or an int; handle both.
+    Type checks instead of try/except: this runs for every received
+    packet and a valid one should never pay exception-frame setup.
     """
-    try:
-        decoded = packet.get("decoded") or {}
-        if isinstance(decoded.get("text"), str):
-            return True
-        port = decoded.get("portnum")
-        if port == "TEXT_MESSAGE_APP":
-            return True
-        try:
-            return int(port) == getattr(
-                meshtastic.portnums_pb2.PortNum,
-                "TEXT_MESSAGE_APP",
-                -999,
-            )
-        except Exception:
-            return False
-    except Exception:
+    if not isinstance(packet, dict):
+        return False
+    decoded = packet.get("decoded")
+    if not isinstance(decoded, dict):
         return False
+    if isinstance(decoded.get("text"), str):
+        return True
+    port = decoded.get("portnum")
+    if port == "TEXT_MESSAGE_APP":
+        return True
+    return isinstance(port, int) and port == _TEXT_MESSAGE_APP_INT
 
 
 def is_direct_to(packet: Dict[str, Any], my_id: Optional[str]) -> bool:
     if not my_id:
         return False
-    return packet.get("toId") == my_id
+    # Meshie interns my_id, so the identity check settles the common
+    # case before the character-wise comparison runs.
+    to = packet.get("toId")
+    return to is my_id or to == my_id
 
 
 __all__ = ["is_text_packet", "is_direct_to"]